@@ -0,0 +1,60 @@
+import os
+import yaml
+
+# === Checkpoint Files ===
+# Shared by fuzz_engine.py and vcd_scraper.py, which both resume long runs from YAML checkpoints
+def save_checkpoint(checkpoint, filename):
+    """
+    Writes a checkpoint atomically, so a crash while saving leaves the previous one intact.
+
+    Args:
+        checkpoint (dict): Checkpoint contents.
+        filename (str): Path of the checkpoint file.
+    """
+    with open(filename + ".tmp", "w") as checkpoint_file:
+        yaml.safe_dump(checkpoint, checkpoint_file)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(filename + ".tmp", filename)
+
+def load_checkpoint(filename):
+    """
+    Loads a checkpoint written by save_checkpoint.
+
+    Args:
+        filename (str): Path of the checkpoint file.
+
+    Returns:
+        dict: Checkpoint contents.
+    """
+    if not os.path.exists(filename):
+        raise RuntimeError(f"No checkpoint to resume from at '{filename}'.")
+    with open(filename, "r") as checkpoint_file:
+        return yaml.safe_load(checkpoint_file)
+
+def discard_checkpoint(filename):
+    """
+    Removes the checkpoint of an earlier run, if any. A run that starts over must do this
+    first, or a crash before its own first checkpoint would leave --resume pointing at
+    the earlier run's state.
+
+    Args:
+        filename (str): Path of the checkpoint file.
+    """
+    for path in (filename, filename + ".tmp"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def check_resume_offset(output_file, offset):
+    """
+    Refuses to resume if the output a checkpoint refers to is shorter than the checkpoint
+    says, e.g. because it was overwritten by another run. Truncating to the offset would
+    otherwise pad the file with NUL bytes.
+
+    Args:
+        output_file: Open file the run appends to.
+        offset (int): Length in bytes the checkpoint recorded for it.
+    """
+    size = output_file.seek(0, os.SEEK_END)
+    if offset > size:
+        raise RuntimeError(f"Checkpoint expects {offset} bytes in '{output_file.name}', which only has {size}.")
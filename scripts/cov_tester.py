@@ -1,6 +1,8 @@
 import re
 import yaml
 from collections import defaultdict
+from seq_coverage import SequenceCoverage, TRACE_FIELDS
+from trace_reader import load_trace
 
 # Load the coverage.yaml structure
 with open("/home/ashvin/thesis/scratch/fuzz/coverage.yaml", "r") as file:
@@ -107,6 +109,11 @@ for reg_num, access_data in register_access.items():
 for range_name, hit_count in immediate_hit_counts.items():
     coverage_data["functional_coverage"]["immediate_coverage"]["ranges"][range_name]["hit_count"] = hit_count
 
+# Add instruction sequence and hazard coverage of the retired instruction stream
+sequence_coverage = SequenceCoverage()
+sequence_coverage.update_from_trace(load_trace("log_vcd.txt", TRACE_FIELDS))
+coverage_data["functional_coverage"]["sequence_coverage"].update(sequence_coverage.to_bins())
+
 # Save the updated coverage data
 with open("updated_coverage.yaml", "w") as file:
     yaml.dump(coverage_data, file)
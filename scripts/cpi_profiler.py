@@ -0,0 +1,235 @@
+import argparse
+import numpy as np
+import yaml
+from trace_reader import CPU_STATES, MNEMONICS, load_trace, retire_indices, decode_mnemonics
+
+# === Configuration Constants ===
+TRACE_FIELDS = ["count_cycle", "cpu_state", "dbg_insn_opcode"]
+STATE_NAMES = list(CPU_STATES)
+
+# Maps a one-hot cpu_state value to its column in STATE_NAMES; anything else maps to -1
+STATE_COLUMN = np.full(256, -1, dtype=np.int64)
+for _column, _state in enumerate(STATE_NAMES):
+    STATE_COLUMN[CPU_STATES[_state]] = _column
+
+# === Trace Segmentation ===
+def profile_trace(trace):
+    """
+    Splits a columnar trace into retired instructions and measures each of them. An
+    instruction spans from the cycle after the previous retirement up to and including
+    its own retiring cycle, so its fetch cycles are counted with it. A partial first
+    instruction (a trace that does not start in fetch) is dropped.
+
+    Leading fetch cycles on which dbg_insn_opcode still shows the previous instruction's
+    word, such as the extra cycle after a shift, are charged to that previous instruction
+    instead. Back-to-back identical words cannot be told apart this way and keep the
+    plain split.
+
+    Args:
+        trace (dict): Trace from trace_reader.load_trace with the TRACE_FIELDS signals.
+
+    Returns:
+        dict: Per-instruction arrays "mnemonics", "cycles" and "state_cycles"
+        (one column per STATE_NAMES entry).
+    """
+    cpu_state = trace["cpu_state"]
+    opcode = trace["dbg_insn_opcode"]
+    if len(cpu_state) == 0:
+        # E.g. a log holding only the "Starting test code section..." marker
+        return {
+            "mnemonics": np.zeros(0, dtype=np.int16),
+            "cycles": np.zeros(0, dtype=np.int64),
+            "state_cycles": np.zeros((0, len(STATE_NAMES)), dtype=np.int64),
+        }
+    retired = retire_indices(cpu_state)
+    starts = np.concatenate([[0], retired[:-1] + 1]).astype(np.int64)
+
+    # Move stale fetch cycles from the start of each instruction to the end of the one before it
+    if len(retired) > 1:
+        previous_word = opcode[retired[:-1]]
+        next_starts = starts[1:].copy()
+        stale = previous_word != opcode[retired[1:]]
+        while stale.any():
+            stale &= (next_starts < retired[1:]) & (cpu_state[next_starts] == CPU_STATES["fetch"]) \
+                & (opcode[next_starts] == previous_word)
+            next_starts[stale] += 1
+        starts[1:] = next_starts
+    ends = np.append(starts[1:] - 1, retired[-1:]).astype(np.int64)
+
+    if len(retired) and cpu_state[0] != CPU_STATES["fetch"]:
+        retired, starts, ends = retired[1:], starts[1:], ends[1:]
+
+    cycles = trace["count_cycle"][ends] - trace["count_cycle"][starts] + 1
+
+    # Bin every logged cycle into (instruction, state) in one bincount
+    instruction = np.searchsorted(ends, np.arange(len(cpu_state)))
+    state = STATE_COLUMN[np.clip(cpu_state, 0, 255)]
+    counted = (instruction < len(retired)) & (state >= 0)
+    if len(starts):
+        counted &= np.arange(len(cpu_state)) >= starts[0]
+    state_cycles = np.bincount(
+        instruction[counted] * len(STATE_NAMES) + state[counted],
+        minlength=len(retired) * len(STATE_NAMES),
+    ).reshape(len(retired), len(STATE_NAMES))
+
+    return {
+        "mnemonics": decode_mnemonics(trace["dbg_insn_opcode"][retired]),
+        "cycles": cycles,
+        "state_cycles": state_cycles,
+    }
+
+def concatenate_profiles(profiles):
+    """Joins the per-instruction arrays of several traces into one set."""
+    return {key: np.concatenate([profile[key] for profile in profiles]) for key in ("mnemonics", "cycles", "state_cycles")}
+
+# === Summaries ===
+def summarize(instructions):
+    """
+    Reduces per-instruction measurements to a profile: overall CPI, cycles spent in each
+    cpu_state, and per-opcode counts, mean cycles, state breakdown and latency histogram.
+
+    Args:
+        instructions (dict): Per-instruction arrays as returned by profile_trace.
+
+    Returns:
+        dict: Profile that can be stored as YAML and compared with diff_profiles.
+    """
+    mnemonics = instructions["mnemonics"].astype(np.int64)
+    cycles = instructions["cycles"]
+    state_cycles = instructions["state_cycles"]
+    total_cycles = int(cycles.sum())
+
+    counts = np.bincount(mnemonics, minlength=len(MNEMONICS))
+    cycle_sums = np.bincount(mnemonics, weights=cycles, minlength=len(MNEMONICS))
+    state_sums = np.zeros((len(MNEMONICS), len(STATE_NAMES)))
+    np.add.at(state_sums, mnemonics, state_cycles)
+
+    # Latency histogram of every opcode from one unique over (mnemonic, cycles) pairs
+    stride = int(cycles.max()) + 1 if len(cycles) else 1
+    pairs, pair_counts = np.unique(mnemonics * stride + cycles, return_counts=True)
+    histograms = {}
+    for pair, count in zip(pairs.tolist(), pair_counts.tolist()):
+        histograms.setdefault(MNEMONICS[pair // stride], {})[pair % stride] = count
+
+    opcodes = {}
+    for index in np.flatnonzero(counts):
+        mnemonic = MNEMONICS[index]
+        opcodes[mnemonic] = {
+            "count": int(counts[index]),
+            "mean_cycles": float(cycle_sums[index] / counts[index]),
+            "state_cycles": {state: float(state_sums[index, column] / counts[index])
+                             for column, state in enumerate(STATE_NAMES) if state_sums[index, column]},
+            "latency_histogram": histograms[mnemonic],
+        }
+
+    return {
+        "instructions": int(len(cycles)),
+        "cycles": total_cycles,
+        "cpi": float(total_cycles / len(cycles)) if len(cycles) else 0.0,
+        "state_cycles": {state: int(total) for state, total in zip(STATE_NAMES, state_cycles.sum(axis=0).tolist())},
+        "opcodes": opcodes,
+    }
+
+def diff_profiles(base, other):
+    """
+    Compares two profiles, e.g. of two picorv32.v configurations or two dhrystone builds.
+    State cycles are compared per instruction, so that profiles of runs with different
+    instruction counts remain comparable.
+
+    Args:
+        base (dict): Reference profile from summarize.
+        other (dict): Profile to compare against it.
+
+    Returns:
+        dict: Base value, other value and change for CPI, the cycles spent in each
+        cpu_state per instruction, and each opcode's count, mean cycles and mean cycles
+        per cpu_state (only the states either side spends cycles in). Opcodes only present
+        in one profile have None on the other side.
+    """
+    def change(base_value, other_value):
+        delta = None if base_value is None or other_value is None else other_value - base_value
+        return {"base": base_value, "other": other_value, "delta": delta}
+
+    def per_instruction(profile, state):
+        return profile["state_cycles"].get(state, 0) / profile["instructions"] if profile["instructions"] else 0.0
+
+    def opcode_change(mnemonic):
+        base_stats, other_stats = base["opcodes"].get(mnemonic), other["opcodes"].get(mnemonic)
+        def field(stats, key):
+            return None if stats is None else stats[key]
+        def state_field(stats, state):
+            return None if stats is None else stats["state_cycles"].get(state, 0.0)
+        return {
+            "count": change(field(base_stats, "count"), field(other_stats, "count")),
+            "mean_cycles": change(field(base_stats, "mean_cycles"), field(other_stats, "mean_cycles")),
+            "state_cycles": {state: change(state_field(base_stats, state), state_field(other_stats, state))
+                             for state in STATE_NAMES if state_field(base_stats, state) or state_field(other_stats, state)},
+        }
+
+    return {
+        "cpi": change(base["cpi"], other["cpi"]),
+        "state_cycles": {state: change(per_instruction(base, state), per_instruction(other, state))
+                         for state in STATE_NAMES},
+        "opcodes": {mnemonic: opcode_change(mnemonic)
+                    for mnemonic in sorted(set(base["opcodes"]) | set(other["opcodes"]))},
+    }
+
+def print_profile(profile):
+    """Prints a profile as a short table sorted by the cycles each opcode takes in total."""
+    print(f"{profile['instructions']} instructions, {profile['cycles']} cycles, CPI {profile['cpi']:.3f}")
+    for state, total in profile["state_cycles"].items():
+        if total:
+            print(f"  {state:<8} {total:>10} cycles ({100 * total / profile['cycles']:.1f}%)")
+    ranked = sorted(profile["opcodes"].items(), key=lambda item: -item[1]["count"] * item[1]["mean_cycles"])
+    for mnemonic, stats in ranked:
+        print(f"  {mnemonic:<10} x{stats['count']:<8} {stats['mean_cycles']:.2f} cycles")
+
+def print_diff(diff):
+    """Prints the changes of a diff from diff_profiles, skipping unchanged entries."""
+    def fmt(value):
+        return "-" if value is None else f"{value:.3f}" if isinstance(value, float) else str(value)
+    def print_change(name, change, indent="  "):
+        if change["delta"] != 0:
+            print(f"{indent}{name:<12} {fmt(change['base']):>10} -> {fmt(change['other']):>10} ({fmt(change['delta'])})")
+    print(f"CPI {fmt(diff['cpi']['base'])} -> {fmt(diff['cpi']['other'])} ({fmt(diff['cpi']['delta'])})")
+    print("Cycles per instruction in each cpu_state:")
+    for state, change in diff["state_cycles"].items():
+        print_change(state, change)
+    print("Opcodes (mean cycles, then count and mean cycles per cpu_state):")
+    for mnemonic, changes in diff["opcodes"].items():
+        details = [("count", changes["count"])] + list(changes["state_cycles"].items())
+        if changes["mean_cycles"]["delta"] == 0 and all(change["delta"] == 0 for _, change in details):
+            continue
+        print(f"  {mnemonic:<12} {fmt(changes['mean_cycles']['base']):>10} -> {fmt(changes['mean_cycles']['other']):>10} "
+              f"({fmt(changes['mean_cycles']['delta'])})")
+        for name, change in details:
+            print_change(name, change, "    ")
+
+# === Example Usage ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Profile cycles per instruction and per cpu_state from scraped PicoRV32 VCD logs."
+    )
+    parser.add_argument("log_files", nargs="*", help="Logs written by vcd_scraper.py, profiled together.")
+    parser.add_argument("--output_file", type=str, default="cpi_profile.yaml",
+                        help="Where to save the profile. Defaults to 'cpi_profile.yaml'.")
+    parser.add_argument("--diff", type=str, nargs=2, metavar=("BASE", "OTHER"), default=None,
+                        help="Compare two saved profiles instead of profiling logs.")
+    args = parser.parse_args()
+
+    if args.diff:
+        profiles = []
+        for profile_file in args.diff:
+            with open(profile_file, "r") as file:
+                profiles.append(yaml.safe_load(file))
+        print_diff(diff_profiles(*profiles))
+    else:
+        if not args.log_files:
+            parser.error("at least one log file is required unless --diff is given")
+        profile = summarize(concatenate_profiles(
+            [profile_trace(load_trace(log_file, TRACE_FIELDS)) for log_file in args.log_files]
+        ))
+        with open(args.output_file, "w") as file:
+            yaml.safe_dump(profile, file)
+        print_profile(profile)
+        print(f"Profile saved to {args.output_file}")
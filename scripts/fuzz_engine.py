@@ -1,7 +1,13 @@
+import os
 import random
+import hashlib
 import yaml
 import argparse
-from test_generator import generate_test_case  # Import test case generator
+import multiprocessing
+from test_generator import generate_test_case, insn_templates  # Import test case generator
+from seq_coverage import SequenceCoverage, DEPENDENCY_KINDS, merge_bins
+from trace_reader import MNEMONIC_INDEX, IS_LOAD, IS_BRANCH, IS_ALU
+from checkpoint import save_checkpoint, load_checkpoint, discard_checkpoint, check_resume_offset
 
 # === Argument Parser Setup ===
 parser = argparse.ArgumentParser(
@@ -37,7 +43,42 @@ parser.add_argument(
     default="coverage.yaml", 
     help="Path to the YAML file containing initial coverage data. Defaults to 'coverage.yaml'."
 )
+parser.add_argument(
+    "--seed",
+    type=int,
+    default=None,
+    help="Campaign seed from which every shard's RNG stream is derived. A random seed is drawn and printed if omitted."
+)
+parser.add_argument(
+    "--num_shards",
+    type=int,
+    default=1,
+    help="Number of worker processes the iterations are sharded across. Default is 1."
+)
+parser.add_argument(
+    "--merge_interval",
+    type=int,
+    default=10,
+    help="Iterations each shard runs before its coverage is merged into the shared weights. Default is 10."
+)
+parser.add_argument(
+    "--replay",
+    type=int,
+    nargs=2,
+    metavar=("SHARD", "ITERATION"),
+    default=None,
+    help="Regenerate the single test case recorded as (--seed, SHARD, ITERATION) instead of running a campaign."
+)
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="Resume the campaign from the last checkpoint in --output_dir instead of starting a new one."
+)
 args = parser.parse_args()
+if args.num_shards < 1:
+    parser.error("--num_shards must be at least 1")
+if args.merge_interval < 1:
+    parser.error("--merge_interval must be at least 1")
 
 # === Load Coverage Data ===
 with open(args.coverage_file, "r") as coverage_file:
@@ -53,6 +94,13 @@ IMMEDIATE_RANGES = {
     "unsigned_5bit": (0, 31),
 }
 
+def sequence_bins(coverage):
+    """
+    Sequence coverage bins of a coverage dictionary, kept under the same
+    functional_coverage.sequence_coverage path as in coverage.yaml, or None if absent.
+    """
+    return coverage.get("functional_coverage", {}).get("sequence_coverage")
+
 # === Weighted Selection Utilities ===
 def calculate_weight(coverage_count, max_coverage=args.max_coverage, smoothing=args.smoothing):
     """
@@ -74,13 +122,14 @@ def calculate_weight(coverage_count, max_coverage=args.max_coverage, smoothing=a
         return 1  # Ensure weight is always >= 1
     return weight
 
-def weighted_selection(items, weights):
+def weighted_selection(items, weights, rng=random):
     """
     Selects an item from a list using weighted probabilities. The randomness is deliberately verbose.
 
     Args:
         items (list): List of items to select from.
         weights (list): Corresponding list of weights for each item.
+        rng (random.Random): Source of randomness, the global random module by default.
 
     Returns:
         Any: Randomly selected item from the input list.
@@ -91,91 +140,459 @@ def weighted_selection(items, weights):
     for w in normalized_weights:
         cumulative += w
         cumulative_probabilities.append(cumulative)
-    random_choice = random.random()
+    random_choice = rng.random()
     for i, cp in enumerate(cumulative_probabilities):
         if random_choice < cp:
             return items[i]
     return items[-1]  # Fallback in case of floating-point error
 
 # === Mutation Functions ===
-def mutate_instruction(instruction):
+# Operand slots of every template as (name, type) pairs, e.g. ("imm", "signed_12bit")
+OPERAND_SLOTS = {
+    template["mnemonic"]: [next(iter(operand.items())) for operand in template.get("operands", [])]
+    for template in insn_templates["instructions"]["RV32I"].values()
+}
+# Immediate ranges that fit inside each declared immediate type, e.g. unsigned_5bit values are valid signed_12bit ones
+NESTED_RANGES = {
+    outer: [inner for inner, (low, high) in IMMEDIATE_RANGES.items()
+            if IMMEDIATE_RANGES[outer][0] <= low and high <= IMMEDIATE_RANGES[outer][1]]
+    for outer in IMMEDIATE_RANGES
+}
+
+def mutate_instruction(instruction, rng=random, history=()):
     """
     Mutates an instruction's operands based on coverage data using weighted probabilities
-    and overly detailed processing logic to make it incomprehensible.
+    and overly detailed processing logic to make it incomprehensible. When the coverage
+    data has sequence coverage bins, each source register is also steered toward a
+    producer at a rarely covered dependency distance (see steer_source).
+
+    Only the operand slots the instruction's template declares are mutated. Immediates are
+    drawn from a coverage-weighted choice among the ranges nested in the type the slot
+    declares, so the mutated instruction still assembles. The returned dictionary only has "rd", "rs1" and "rs2" keys for the
+    register slots the instruction actually has.
 
     Args:
         instruction (dict): The instruction to mutate, as a dictionary.
+        rng (random.Random): Source of randomness, the global random module by default.
+        history (list): Already mutated instructions preceding this one, oldest first.
 
     Returns:
         dict: The mutated instruction dictionary.
     """
-    if instruction["opcode"] == "EBREAK":
-        # EBREAK is a special instruction and won't be mutated
+    if instruction["opcode"] == "EBREAK" or instruction.get("padding"):
+        # EBREAK and the padding NOPs around a test case won't be mutated
         return instruction
 
     # Introduce verbose and redundant selection logic
     mutated_rd = weighted_selection(
         list(coverage_data["registers"].keys()),
         [calculate_weight(coverage_data["registers"][reg]["read_count"] + coverage_data["registers"][reg]["write_count"])
-         for reg in coverage_data["registers"]]
+         for reg in coverage_data["registers"]],
+        rng
     )
     mutated_rs1 = weighted_selection(
         list(coverage_data["registers"].keys()),
-        [calculate_weight(coverage_data["registers"][reg]["read_count"]) for reg in coverage_data["registers"]]
+        [calculate_weight(coverage_data["registers"][reg]["read_count"]) for reg in coverage_data["registers"]],
+        rng
     )
     mutated_rs2 = weighted_selection(
         list(coverage_data["registers"].keys()),
-        [calculate_weight(coverage_data["registers"][reg]["write_count"]) for reg in coverage_data["registers"]]
-    )
-    mutated_imm_range = weighted_selection(
-        [r for r in IMMEDIATE_RANGES],
-        [calculate_weight(range_data["coverage_count"]) for range_data in coverage_data["immediate_coverage"]["ranges"]]
+        [calculate_weight(coverage_data["registers"][reg]["write_count"]) for reg in coverage_data["registers"]],
+        rng
     )
-    mutated_imm = random.randint(IMMEDIATE_RANGES[mutated_imm_range][0], IMMEDIATE_RANGES[mutated_imm_range][1])
 
-    return {
-        "opcode": instruction["opcode"],
-        "rd": mutated_rd,
-        "rs1": mutated_rs1,
-        "rs2": mutated_rs2,
-        "imm": mutated_imm,
-        "imm_range": mutated_imm_range,
-    }
+    # Steer the source registers toward dependency distances that are still rarely covered
+    mutated_sources = {"rs1": mutated_rs1, "rs2": mutated_rs2}
+    if sequence_bins(coverage_data) and history:
+        for name, operand_type in OPERAND_SLOTS[instruction["opcode"]]:
+            if name in mutated_sources and operand_type == "reg":
+                mutated_sources[name] = steer_source(instruction["opcode"], name, mutated_sources[name], history, rng)
+    mutated_registers = {"rd": mutated_rd, **mutated_sources}
+
+    # Rebuild the operand list slot by slot in template order so the test case can still be written out
+    mutated_instruction = {"opcode": instruction["opcode"]}
+    mutated_operands = []
+    for (name, operand_type), operand in zip(OPERAND_SLOTS[instruction["opcode"]], instruction["operands"]):
+        if operand_type == "reg":
+            mutated_instruction[name] = mutated_registers[name]
+            mutated_operands.append(mutated_registers[name])
+        elif operand_type in IMMEDIATE_RANGES:
+            range_counts = dict(zip(IMMEDIATE_RANGES, coverage_data["immediate_coverage"]["ranges"]))
+            mutated_imm_range = weighted_selection(
+                NESTED_RANGES[operand_type],
+                [calculate_weight(range_counts[r]["coverage_count"]) for r in NESTED_RANGES[operand_type]],
+                rng
+            )
+            mutated_instruction["imm"] = rng.randint(*IMMEDIATE_RANGES[mutated_imm_range])
+            mutated_instruction["imm_range"] = mutated_imm_range
+            mutated_operands.append(mutated_instruction["imm"])
+        else:
+            mutated_operands.append(operand)  # e.g. CSR numbers are kept as generated
+    mutated_instruction["operands"] = mutated_operands
+    return mutated_instruction
+
+def steer_source(opcode, slot, register, history, rng=random):
+    """
+    Picks a producer distance for one source register, weighted by how rarely each
+    distance is covered, and reads the register the producer at that distance writes.
+
+    Every distance is weighted by its raw_rs1 or raw_rs2 bin. A load producer can also
+    weight it by its load_use bin and an ALU producer of a branch by its branch_after_alu
+    bin; the rarest applicable bin wins. Distances are only eligible if the instruction
+    there writes a register other than x0 that no closer instruction overwrites, which
+    is what the nearest-producer bins measure. Distance 0 keeps the register as drawn.
+
+    Args:
+        opcode (str): Mnemonic of the consuming instruction.
+        slot (str): "rs1" or "rs2".
+        register (str): Register drawn for the slot without steering.
+        history (list): Already mutated instructions preceding this one, oldest first.
+        rng (random.Random): Source of randomness, the global random module by default.
+
+    Returns:
+        str: The steered source register.
+    """
+    dependencies = sequence_bins(coverage_data)["dependencies"]
+    counts = dict(zip(DEPENDENCY_KINDS, (dependencies.get(kind) for kind in DEPENDENCY_KINDS)))
+    if not counts[f"raw_{slot}"]:
+        return register
+    consumer_is_branch = IS_BRANCH[MNEMONIC_INDEX.get(opcode, 0)]
+    weights = [calculate_weight(counts[f"raw_{slot}"][0])]
+    overwritten = set()
+    for distance in range(1, len(counts[f"raw_{slot}"])):
+        producer = history[-distance] if distance <= len(history) else {}
+        rd = producer.get("rd", "x0")
+        if rd == "x0" or rd in overwritten:
+            weights.append(0)
+        else:
+            producer_index = MNEMONIC_INDEX.get(producer["opcode"], 0)
+            bins = [counts[f"raw_{slot}"]]
+            if IS_LOAD[producer_index] and counts["load_use"]:
+                bins.append(counts["load_use"])
+            if consumer_is_branch and IS_ALU[producer_index] and counts["branch_after_alu"]:
+                bins.append(counts["branch_after_alu"])
+            weights.append(max(calculate_weight(kind_counts[distance]) for kind_counts in bins))
+        overwritten.add(rd)
+    distance = weighted_selection(list(range(len(weights))), weights, rng)
+    return history[-distance]["rd"] if distance else register
 
 # === Fuzzing Process ===
-def fuzz_test_case(test_case):
+def fuzz_test_case(test_case, rng=random):
     """
     Applies mutations to all instructions in a test case using a highly convoluted
-    mutation process.
+    mutation process. Padding NOPs and EBREAK are passed through unchanged.
 
     Args:
         test_case (list): List of instructions as dictionaries.
+        rng (random.Random): Source of randomness, the global random module by default.
 
     Returns:
         list: Mutated test case.
     """
     fuzzed_case = []
     for instruction in test_case:
-        fuzzed_case.append(mutate_instruction(instruction))
+        fuzzed_case.append(mutate_instruction(instruction, rng, fuzzed_case))
     return fuzzed_case
 
-# === Main Fuzzing Loop ===
-for iteration in range(MAX_ITERATIONS):
-    # Generate a seed test case using the generator
-    seed_test_case = generate_test_case(category="arithmetic_logical")
-    
-    # Apply mutations to create a fuzzed test case
-    fuzzed_test_case = fuzz_test_case(seed_test_case)
-    
-    # Save the fuzzed test case to the output directory
-    output_filename = f"{args.output_dir}/fuzzed_test_{iteration}.S"
+def save_test_case(test_case, output_filename):
+    """
+    Writes a fuzzed test case to disk in assembly format, one instruction per line.
+
+    Args:
+        test_case (list): List of instructions as dictionaries.
+        output_filename (str): Path of the .S file to write.
+    """
     with open(output_filename, "w") as output_file:
-        for instruction in fuzzed_test_case:
+        for instruction in test_case:
             operands = ", ".join(map(str, instruction["operands"]))
             output_file.write(f"{instruction['opcode']} {operands}\n")
-    print(f"Fuzzed test case saved to {output_filename}")
 
-# === Save Updated Coverage ===
-with open(args.coverage_file, "w") as coverage_file:
-    yaml.safe_dump(coverage_data, coverage_file)
-print("Coverage data updated.")
+def load_test_case(filename):
+    """
+    Reads back a test case written by save_test_case. Register operands are keyed by
+    their template slot names, which is all sequence coverage needs.
+
+    Args:
+        filename (str): Path of the .S file to read.
+
+    Returns:
+        list: Instructions as dictionaries.
+    """
+    test_case = []
+    with open(filename, "r") as test_file:
+        for line in test_file:
+            opcode, _, operands = line.strip().partition(" ")
+            instruction = {"opcode": opcode, "operands": operands.split(", ") if operands else []}
+            for (name, operand_type), operand in zip(OPERAND_SLOTS.get(opcode, []), instruction["operands"]):
+                if operand_type == "reg":
+                    instruction[name] = operand
+            test_case.append(instruction)
+    return test_case
+
+# === Sharded, Reproducible Campaigns ===
+def derive_seed(campaign_seed, shard, iteration):
+    """
+    Derives the seed of a single program from the campaign seed, its shard and its
+    shard-local iteration. Hashing keeps the per-program streams independent of each
+    other and of the order in which the worker processes happen to run.
+
+    Args:
+        campaign_seed (int): Seed of the whole fuzzing campaign.
+        shard (int): Index of the worker shard.
+        iteration (int): Iteration number local to the shard.
+
+    Returns:
+        int: A 64-bit seed for random.Random.
+    """
+    digest = hashlib.sha256(f"{campaign_seed}:{shard}:{iteration}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+def generate_fuzzed_test_case(campaign_seed, shard, iteration):
+    """
+    Generates and mutates one test case from its own deterministic RNG stream. Given the
+    same coverage weights, the same (campaign_seed, shard, iteration) always yields the
+    same program.
+
+    Args:
+        campaign_seed (int): Seed of the whole fuzzing campaign.
+        shard (int): Index of the worker shard.
+        iteration (int): Iteration number local to the shard.
+
+    Returns:
+        list: Mutated test case.
+    """
+    rng = random.Random(derive_seed(campaign_seed, shard, iteration))
+    seed_test_case = generate_test_case(category="arithmetic_logical", rng=rng)
+    return fuzz_test_case(seed_test_case, rng)
+
+def tally_coverage(test_case, coverage_delta):
+    """
+    Accumulates the register, immediate range and dependency distance usage of a fuzzed
+    test case into a shard-local coverage delta, using the same counters the mutation
+    weights read.
+
+    Args:
+        test_case (list): Mutated test case.
+        coverage_delta (dict): Delta being accumulated by the shard, updated in place.
+    """
+    # Only mutated instructions carry slot keys, and only for the slots they actually have
+    registers = coverage_delta.setdefault("registers", {})
+    ranges = coverage_delta.setdefault("immediate_ranges", {})
+    for instruction in test_case:
+        if "rd" in instruction:
+            registers.setdefault(instruction["rd"], {"read_count": 0, "write_count": 0})["write_count"] += 1
+        for slot in ("rs1", "rs2"):
+            if slot in instruction:
+                registers.setdefault(instruction[slot], {"read_count": 0, "write_count": 0})["read_count"] += 1
+        if "imm_range" in instruction:
+            ranges[instruction["imm_range"]] = ranges.get(instruction["imm_range"], 0) + 1
+    # Only the fixed-size dependency bins are shared; n-grams are counted once per campaign
+    sequence_coverage = SequenceCoverage()
+    sequence_coverage.update_from_test_case(test_case)
+    merge_bins(coverage_delta.setdefault("sequence_coverage", {"dependencies": {}}), {
+        "dependencies": {kind: row.tolist() for kind, row in zip(DEPENDENCY_KINDS, sequence_coverage.dependency_counts)},
+    })
+
+def merge_coverage(coverage, coverage_delta):
+    """
+    Adds a shard's coverage delta into the shared coverage data. Immediate ranges are
+    matched to coverage entries by position, in the order of IMMEDIATE_RANGES.
+
+    Args:
+        coverage (dict): Shared coverage data, updated in place.
+        coverage_delta (dict): Delta returned by a shard.
+    """
+    for reg, counts in coverage_delta.get("registers", {}).items():
+        coverage["registers"][reg]["read_count"] += counts["read_count"]
+        coverage["registers"][reg]["write_count"] += counts["write_count"]
+    range_names = list(IMMEDIATE_RANGES)
+    for range_name, count in coverage_delta.get("immediate_ranges", {}).items():
+        coverage["immediate_coverage"]["ranges"][range_names.index(range_name)]["coverage_count"] += count
+    if "sequence_coverage" in coverage_delta:
+        merge_bins(coverage.setdefault("functional_coverage", {}).setdefault("sequence_coverage", {"dependencies": {}}),
+                   coverage_delta["sequence_coverage"])
+
+def run_shard_epoch(campaign_seed, shard, iterations, coverage_snapshot, output_dir):
+    """
+    Runs one epoch of a shard: generates, mutates and saves its programs against a fixed
+    snapshot of the shared coverage, which keeps every program reproducible no matter
+    how the shards are scheduled.
+
+    Args:
+        campaign_seed (int): Seed of the whole fuzzing campaign.
+        shard (int): Index of the worker shard.
+        iterations (list): (iteration, test_index) pairs this shard runs in the epoch.
+        coverage_snapshot (dict): Shared coverage as of the start of the epoch.
+        output_dir (str): Directory where fuzzed test cases are saved.
+
+    Returns:
+        tuple: (list of manifest records, coverage delta dict)
+    """
+    global coverage_data
+    coverage_data = coverage_snapshot
+    records = []
+    coverage_delta = {}
+    for iteration, test_index in iterations:
+        fuzzed_test_case = generate_fuzzed_test_case(campaign_seed, shard, iteration)
+        output_filename = f"{output_dir}/fuzzed_test_{test_index}.S"
+        save_test_case(fuzzed_test_case, output_filename)
+        tally_coverage(fuzzed_test_case, coverage_delta)
+        records.append({"file": output_filename, "seed": campaign_seed, "shard": shard, "iteration": iteration})
+    return records, coverage_delta
+
+def epoch_coverage_filename(output_dir, epoch):
+    """Path of the coverage snapshot the programs of an epoch were generated against."""
+    return f"{output_dir}/coverage_epoch_{epoch}.yaml"
+
+def checkpoint_filename(output_dir):
+    """Path of the checkpoint a campaign in output_dir is resumed from."""
+    return f"{output_dir}/checkpoint.yaml"
+
+def run_campaign(campaign_seed, num_shards, merge_interval, output_dir, start_epoch=0, manifest_offset=0):
+    """
+    Runs MAX_ITERATIONS fuzzing iterations sharded over num_shards worker processes.
+    Test case number n is iteration n // num_shards of shard n % num_shards. Shards run
+    merge_interval iterations per epoch, after which their coverage deltas are merged in
+    shard order into the shared weights. The coverage each epoch started from and the
+    (seed, shard, iteration) of every program are saved in output_dir.
+
+    After every epoch the manifest is flushed and a checkpoint is saved holding the
+    campaign parameters, the next epoch, the manifest length and the merged coverage.
+    Per-program RNG streams are derived from the seed, so the seed and the next epoch
+    are all the RNG state a resumed campaign needs.
+
+    Args:
+        campaign_seed (int): Seed of the whole fuzzing campaign.
+        num_shards (int): Number of worker processes.
+        merge_interval (int): Iterations per shard between coverage merges.
+        output_dir (str): Directory where fuzzed test cases are saved.
+        start_epoch (int): First epoch to run, non-zero when resuming.
+        manifest_offset (int): Manifest length in bytes at the checkpoint; anything an
+            interrupted epoch appended after it is discarded.
+    """
+    global coverage_data
+    shard_iterations = [[] for _ in range(num_shards)]
+    for test_index in range(MAX_ITERATIONS):
+        shard_iterations[test_index % num_shards].append((test_index // num_shards, test_index))
+    num_epochs = -(-len(shard_iterations[0]) // merge_interval)
+
+    pool = multiprocessing.Pool(num_shards) if num_shards > 1 else None
+    try:
+        with open(f"{output_dir}/manifest.yaml", "a+") as manifest_file:
+            check_resume_offset(manifest_file, manifest_offset)
+            manifest_file.truncate(manifest_offset)
+            for epoch in range(start_epoch, num_epochs):
+                with open(epoch_coverage_filename(output_dir, epoch), "w") as snapshot_file:
+                    yaml.safe_dump(coverage_data, snapshot_file)
+                tasks = [
+                    (campaign_seed, shard, iterations[epoch * merge_interval:(epoch + 1) * merge_interval],
+                     coverage_data, output_dir)
+                    for shard, iterations in enumerate(shard_iterations)
+                ]
+                results = pool.starmap(run_shard_epoch, tasks) if pool else [run_shard_epoch(*tasks[0])]
+                # Merge in shard order so the shared weights never depend on scheduling
+                for records, coverage_delta in results:
+                    merge_coverage(coverage_data, coverage_delta)
+                    if not records:
+                        continue  # A shard with no iterations left; dumping [] would break the manifest
+                    for record in records:
+                        record["epoch"] = epoch
+                    yaml.safe_dump(records, manifest_file)
+                    print(f"Fuzzed test cases saved: {', '.join(record['file'] for record in records)}")
+                manifest_file.flush()
+                save_checkpoint({
+                    "seed": campaign_seed,
+                    "num_shards": num_shards,
+                    "merge_interval": merge_interval,
+                    "max_iterations": MAX_ITERATIONS,
+                    "next_epoch": epoch + 1,
+                    "manifest_offset": manifest_file.tell(),
+                    "coverage": coverage_data,
+                }, checkpoint_filename(output_dir))
+                print(f"Checkpoint saved after epoch {epoch + 1}/{num_epochs}")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+def count_campaign_ngrams(output_dir):
+    """
+    Counts the opcode n-grams of every program in a campaign's manifest. N-grams are kept
+    out of the shared coverage, which is copied to every worker and saved every epoch,
+    and are counted from the saved programs once the campaign is complete instead.
+
+    Args:
+        output_dir (str): Directory of the campaign.
+
+    Returns:
+        dict: N-gram bins as in SequenceCoverage.to_bins, {n: {"ADD>SUB": count}}.
+    """
+    with open(f"{output_dir}/manifest.yaml", "r") as manifest_file:
+        records = yaml.safe_load(manifest_file) or []
+    sequence_coverage = SequenceCoverage()
+    for record in records:
+        sequence_coverage.restart()
+        sequence_coverage.update_from_test_case(load_test_case(record["file"]))
+    return sequence_coverage.to_bins()["ngrams"]
+
+def replay_test_case(campaign_seed, shard, iteration, output_dir):
+    """
+    Regenerates a single program of an earlier campaign from its recorded (seed, shard,
+    iteration) and the coverage snapshot of its epoch. The epoch is looked up in the
+    campaign's manifest, so the replay does not depend on the current command line.
+
+    Returns:
+        str: Path of the regenerated test case.
+    """
+    global coverage_data
+    manifest_filename = f"{output_dir}/manifest.yaml"
+    if not os.path.exists(manifest_filename):
+        raise RuntimeError(f"No campaign manifest to replay from at '{manifest_filename}'.")
+    with open(manifest_filename, "r") as manifest_file:
+        records = yaml.safe_load(manifest_file) or []
+    epochs = [record["epoch"] for record in records
+              if (record["seed"], record["shard"], record["iteration"]) == (campaign_seed, shard, iteration)]
+    if not epochs:
+        raise RuntimeError(f"Seed {campaign_seed}, shard {shard}, iteration {iteration} is not in '{manifest_filename}'.")
+    with open(epoch_coverage_filename(output_dir, epochs[-1]), "r") as snapshot_file:
+        coverage_data = yaml.safe_load(snapshot_file)
+    fuzzed_test_case = generate_fuzzed_test_case(campaign_seed, shard, iteration)
+    output_filename = f"{output_dir}/fuzzed_test_replay_s{shard}_i{iteration}.S"
+    save_test_case(fuzzed_test_case, output_filename)
+    return output_filename
+
+# === Main Fuzzing Loop ===
+if __name__ == "__main__":
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.replay:
+        if args.seed is None:
+            parser.error("--replay requires the --seed of the original campaign")
+        print(f"Replayed test case saved to {replay_test_case(args.seed, *args.replay, args.output_dir)}")
+    else:
+        # N-grams already in the coverage file stay out of the shared coverage and are saved back unchanged
+        recorded_ngrams = sequence_bins(coverage_data).pop("ngrams", None) if sequence_bins(coverage_data) else None
+        if args.resume:
+            checkpoint = load_checkpoint(checkpoint_filename(args.output_dir))
+            MAX_ITERATIONS = checkpoint["max_iterations"]
+            coverage_data = checkpoint["coverage"]
+            print(f"Resuming campaign seed {checkpoint['seed']} at epoch {checkpoint['next_epoch']}")
+            run_campaign(checkpoint["seed"], checkpoint["num_shards"], checkpoint["merge_interval"], args.output_dir,
+                         checkpoint["next_epoch"], checkpoint["manifest_offset"])
+        else:
+            # A new campaign must not leave an older campaign's checkpoint behind for --resume to find
+            discard_checkpoint(checkpoint_filename(args.output_dir))
+            campaign_seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2**32)
+            print(f"Campaign seed: {campaign_seed} ({args.num_shards} shards, merge every {args.merge_interval} iterations)")
+            run_campaign(campaign_seed, args.num_shards, args.merge_interval, args.output_dir)
+
+        ngrams_filename = f"{args.output_dir}/sequence_ngrams.yaml"
+        with open(ngrams_filename, "w") as ngrams_file:
+            yaml.safe_dump(count_campaign_ngrams(args.output_dir), ngrams_file)
+        print(f"Sequence n-grams of the campaign saved to {ngrams_filename}")
+
+        # === Save Updated Coverage ===
+        if recorded_ngrams is not None:
+            sequence_bins(coverage_data)["ngrams"] = recorded_ngrams
+        with open(args.coverage_file, "w") as coverage_file:
+            yaml.safe_dump(coverage_data, coverage_file)
+        print("Coverage data updated.")
@@ -0,0 +1,163 @@
+import os
+import argparse
+import numpy as np
+
+# === Configuration Constants ===
+FORMATS = ("hex", "bin", "lanes")
+NUM_LANES = 4  # Byte lanes of the 32-bit PicoRV32 memory
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+NEWLINE = ord("\n")
+
+# === Image Conversion ===
+def to_words(image):
+    """
+    Views a memory image as little-endian 32-bit words. Bytes-like images (bytes,
+    bytearray, memoryview, mmap), arrays with 1-byte items and uint32 arrays are wrapped
+    without copying; only strided views, big-endian words and images whose length is not
+    a whole number of words are copied. Arrays of any other dtype are rejected rather than cast value by value.
+
+    Args:
+        image: Raw little-endian image bytes, a byte array or an array of words.
+
+    Returns:
+        np.ndarray: One-dimensional array of dtype '<u4'.
+    """
+    if isinstance(image, np.ndarray):
+        if image.dtype.kind == "u" and image.dtype.itemsize == 4:
+            return np.ascontiguousarray(image.reshape(-1), dtype="<u4")
+        if image.dtype.itemsize != 1:
+            raise ValueError(f"Image arrays must hold raw bytes or uint32 words, not {image.dtype}.")
+        image = np.ascontiguousarray(image).reshape(-1).view(np.uint8)
+    data = memoryview(image).cast("B")
+    if data.nbytes % 4:
+        data = bytes(data) + bytes(4 - data.nbytes % 4)
+    return np.frombuffer(data, dtype="<u4")
+
+def _hex_lines(values, digits):
+    """
+    Formats the last axis of a uint8 array as lines of hex digits, most significant byte
+    first, in a single vectorized pass.
+    """
+    lines = np.empty(values.shape[:-1] + (digits + 1,), dtype=np.uint8)
+    lines[..., 0:digits:2] = HEX_DIGITS[values >> 4]
+    lines[..., 1:digits:2] = HEX_DIGITS[values & 0xf]
+    lines[..., digits] = NEWLINE
+    return lines
+
+def readmemh_lines(words):
+    """
+    Formats words as $readmemh text, one 8-digit word per line.
+
+    Args:
+        words (np.ndarray): Words of shape (..., nwords).
+
+    Returns:
+        np.ndarray: uint8 text of shape (..., nwords, 9).
+    """
+    return _hex_lines(words.astype(">u4").view(np.uint8).reshape(words.shape + (4,)), 8)
+
+def lane_lines(words):
+    """
+    Splits words into byte-lane banks formatted as $readmemh text. Lane k holds byte k
+    of every word, i.e. the bytes at addresses 4 * i + k.
+
+    Args:
+        words (np.ndarray): Words of shape (..., nwords).
+
+    Returns:
+        np.ndarray: uint8 text of shape (..., NUM_LANES, nwords, 3).
+    """
+    lanes = np.moveaxis(words.astype("<u4").view(np.uint8).reshape(words.shape + (NUM_LANES,)), -1, -2)
+    return _hex_lines(lanes[..., np.newaxis], 2)
+
+# === Image Writing ===
+def _write_formats(words, text, lanes, tails, padding, output_prefix, formats):
+    # Zero padding is written from the shared formatted tails, sliced to padding words
+    if "hex" in formats:
+        with open(f"{output_prefix}.hex", "wb") as file:
+            file.write(text)
+            file.write(tails["hex"][:padding])
+    if "bin" in formats:
+        with open(f"{output_prefix}.bin", "wb") as file:
+            file.write(memoryview(words))
+            file.write(tails["bin"][:padding])
+    if "lanes" in formats:
+        for lane in range(NUM_LANES):
+            with open(f"{output_prefix}.lane{lane}.hex", "wb") as file:
+                file.write(lanes[lane])
+                file.write(tails["lanes"][:padding])
+
+def write_image(image, output_prefix, nwords=None, formats=FORMATS):
+    """
+    Writes one memory image in the requested formats: <prefix>.hex ($readmemh, one word
+    per line), <prefix>.bin (raw little-endian) and <prefix>.lane0.hex to .lane3.hex
+    (one $readmemh bank per byte lane).
+
+    Args:
+        image: Raw little-endian image bytes or an array of words.
+        output_prefix (str): Path prefix of the files written.
+        nwords (int): Memory size in words the image is padded to, or None to keep its size.
+        formats (tuple): Subset of FORMATS to write.
+    """
+    write_images([image], [output_prefix], nwords, formats)
+
+def write_images(images, output_prefixes, nwords=None, formats=FORMATS):
+    """
+    Writes a batch of memory images, e.g. all programs of a fuzzing epoch. Only the words
+    the images actually hold are formatted, in a single vectorized pass over all of them;
+    the zero padding up to nwords is formatted once and shared by every file, so memory
+    use follows the size of the programs rather than the size of the memory.
+
+    Args:
+        images (list): Raw little-endian image bytes or arrays of words.
+        output_prefixes (list): Path prefix of the files written for each image.
+        nwords (int): Memory size in words every image is padded to, or None to keep
+            each image's size.
+        formats (tuple): Subset of FORMATS to write.
+    """
+    if len(images) != len(output_prefixes):
+        raise ValueError("Every image needs exactly one output prefix.")
+    images = [to_words(image) for image in images]
+    sizes = [len(words) for words in images]
+    for size in sizes:
+        if nwords is not None and size > nwords:
+            raise ValueError(f"Image of {size} words does not fit in a memory of {nwords} words.")
+    offsets = np.cumsum([0] + sizes)
+    batch = np.concatenate(images) if images else np.zeros(0, dtype="<u4")
+    text = readmemh_lines(batch) if "hex" in formats else None
+    lanes = lane_lines(batch) if "lanes" in formats else None
+
+    # Formatted zero words, enough to pad the smallest image
+    zeros = np.zeros(0 if nwords is None or not sizes else nwords - min(sizes), dtype="<u4")
+    tails = {"hex": readmemh_lines(zeros), "bin": zeros, "lanes": lane_lines(zeros)[0]}
+    for index, output_prefix in enumerate(output_prefixes):
+        start, end = offsets[index], offsets[index + 1]
+        _write_formats(images[index],
+                       text[start:end] if text is not None else None,
+                       lanes[:, start:end] if lanes is not None else None,
+                       tails, 0 if nwords is None else nwords - sizes[index], output_prefix, formats)
+
+# === Example Usage ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert raw binary programs into PicoRV32 memory images.")
+    parser.add_argument("bin_files", nargs="+", help="Raw binaries, e.g. from objcopy -O binary.")
+    parser.add_argument("nwords", type=int, help="Memory size in 32-bit words, e.g. 32768 as in the firmware Makefile.")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["hex"],
+                        help="Image formats to write. Defaults to $readmemh hex only.")
+    parser.add_argument("--output_dir", type=str, default=None,
+                        help="Directory for the images. Defaults to the directory of each input.")
+    args = parser.parse_args()
+
+    images = []
+    for bin_file in args.bin_files:
+        with open(bin_file, "rb") as file:
+            images.append(file.read())
+    output_prefixes = [bin_file[:-4] if bin_file.endswith(".bin") else bin_file for bin_file in args.bin_files]
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+        output_prefixes = [os.path.join(args.output_dir, os.path.basename(prefix)) for prefix in output_prefixes]
+    if "bin" in args.formats and any(os.path.abspath(f"{prefix}.bin") == os.path.abspath(bin_file)
+                                     for prefix, bin_file in zip(output_prefixes, args.bin_files)):
+        parser.error("the bin format would overwrite an input file; pass --output_dir")
+    write_images(images, output_prefixes, args.nwords, args.formats)
+    print(f"Wrote {len(images)} memory images ({', '.join(args.formats)})")
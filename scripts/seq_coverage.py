@@ -0,0 +1,175 @@
+import argparse
+import numpy as np
+import yaml
+from trace_reader import (
+    MNEMONICS, READS_RS1, READS_RS2, WRITES_RD, IS_LOAD, IS_BRANCH, IS_ALU,
+    load_trace, retire_indices, decode_mnemonics, encode_mnemonics,
+)
+
+# === Configuration Constants ===
+NGRAM_SIZES = (2, 3, 4)
+MAX_DISTANCE = 4  # Longest producer -> consumer distance, in retired instructions, that is binned
+NGRAM_BITS = 6  # Bits per mnemonic index when packing an n-gram into one integer
+DEPENDENCY_KINDS = ["raw_rs1", "raw_rs2", "load_use", "branch_after_alu"]
+TRACE_FIELDS = ["cpu_state", "dbg_insn_opcode", "dbg_insn_rd", "dbg_insn_rs1", "dbg_insn_rs2"]
+
+assert len(MNEMONICS) <= 1 << NGRAM_BITS
+
+# === Sequence Coverage Engine ===
+class SequenceCoverage:
+    """
+    Rolling opcode n-gram and register dependency distance counters over a stream of
+    retired instructions, updated one batch at a time.
+
+    N-grams are packed into integers and counted sparsely. Dependency counters are a
+    dense array with one row per DEPENDENCY_KINDS entry and one column per distance.
+    Column 0 counts consumers with no producer within MAX_DISTANCE. The last few
+    instructions of each batch are carried over, so n-grams and dependencies that span
+    two batches are still counted exactly once.
+    """
+    def __init__(self):
+        self.ngram_counts = {n: {} for n in NGRAM_SIZES}
+        self.dependency_counts = np.zeros((len(DEPENDENCY_KINDS), MAX_DISTANCE + 1), dtype=np.int64)
+        self._carry = max(max(NGRAM_SIZES) - 1, MAX_DISTANCE)
+        self.restart()
+
+    def restart(self):
+        """Starts a new instruction stream, e.g. the next program, so that no n-gram or
+        dependency is counted across the boundary."""
+        self._tail = tuple(np.zeros(0, dtype=np.int64) for _ in range(4))
+
+    def update(self, mnemonics, rd, rs1, rs2):
+        """
+        Counts a batch of retired instructions, continuing from the previous batch.
+
+        Args:
+            mnemonics (np.ndarray): Indices into MNEMONICS.
+            rd (np.ndarray): Destination register numbers.
+            rs1 (np.ndarray): First source register numbers.
+            rs2 (np.ndarray): Second source register numbers.
+        """
+        batch = [np.asarray(column, dtype=np.int64) for column in (mnemonics, rd, rs1, rs2)]
+        mnemonics, rd, rs1, rs2 = (np.concatenate([tail, column]) for tail, column in zip(self._tail, batch))
+        first_new = len(self._tail[0])
+        self._tail = tuple(column[-self._carry:] for column in (mnemonics, rd, rs1, rs2))
+        self._count_ngrams(mnemonics, first_new)
+        self._count_dependencies(mnemonics, rd, rs1, rs2, first_new)
+
+    def _count_ngrams(self, mnemonics, first_new):
+        for n in NGRAM_SIZES:
+            if len(mnemonics) < n:
+                continue
+            codes = np.zeros(len(mnemonics) - n + 1, dtype=np.int64)
+            for offset in range(n):
+                codes = (codes << NGRAM_BITS) | mnemonics[offset:len(mnemonics) - n + 1 + offset]
+            # Only n-grams ending in the new part of the batch have not been counted before
+            codes, counts = np.unique(codes[max(first_new - n + 1, 0):], return_counts=True)
+            ngram_counts = self.ngram_counts[n]
+            for code, count in zip(codes.tolist(), counts.tolist()):
+                ngram_counts[code] = ngram_counts.get(code, 0) + count
+
+    def _count_dependencies(self, mnemonics, rd, rs1, rs2, first_new):
+        writes = WRITES_RD[mnemonics] & (rd != 0)
+        nearest = {}
+        for slot, source, reads in (("rs1", rs1, READS_RS1[mnemonics]), ("rs2", rs2, READS_RS2[mnemonics])):
+            # Going from the farthest distance down leaves the most recent producer in place
+            distance = np.zeros(len(mnemonics), dtype=np.int64)
+            for d in range(MAX_DISTANCE, 0, -1):
+                produced = np.zeros(len(mnemonics), dtype=bool)
+                produced[d:] = writes[:-d] & (rd[:-d] == source[d:])
+                distance[produced] = d
+            distance[~reads | (source == 0)] = 0
+            nearest[slot] = distance
+            consumers = reads[first_new:] & (source[first_new:] != 0)
+            self.dependency_counts[DEPENDENCY_KINDS.index(f"raw_{slot}")] += np.bincount(
+                distance[first_new:][consumers], minlength=MAX_DISTANCE + 1)
+
+        # Closest producer over both source operands, and what kind of instruction it is
+        closest = np.where(nearest["rs1"] == 0, nearest["rs2"],
+                           np.where(nearest["rs2"] == 0, nearest["rs1"], np.minimum(nearest["rs1"], nearest["rs2"])))
+        producer = mnemonics[np.maximum(np.arange(len(mnemonics)) - closest, 0)]
+        consumers = (READS_RS1[mnemonics] & (rs1 != 0)) | (READS_RS2[mnemonics] & (rs2 != 0))
+        for kind, producer_flags, consumer_mask in (
+            ("load_use", IS_LOAD, consumers),
+            ("branch_after_alu", IS_ALU, IS_BRANCH[mnemonics]),
+        ):
+            distance = np.where((closest > 0) & producer_flags[producer], closest, 0)
+            self.dependency_counts[DEPENDENCY_KINDS.index(kind)] += np.bincount(
+                distance[first_new:][consumer_mask[first_new:]], minlength=MAX_DISTANCE + 1)
+
+    def update_from_trace(self, trace):
+        """
+        Counts the instructions retired in a columnar trace from trace_reader.load_trace.
+
+        Args:
+            trace (dict): Must contain the TRACE_FIELDS signals.
+        """
+        retired = retire_indices(trace["cpu_state"])
+        self.update(decode_mnemonics(trace["dbg_insn_opcode"][retired]), trace["dbg_insn_rd"][retired],
+                    trace["dbg_insn_rs1"][retired], trace["dbg_insn_rs2"][retired])
+
+    def update_from_test_case(self, test_case):
+        """
+        Counts a generated or fuzzed test case as if it retired in program order.
+
+        Args:
+            test_case (list): Instructions as dictionaries with "opcode", "rd", "rs1" and "rs2".
+        """
+        def register(instruction, field):
+            return int(instruction.get(field, "x0")[1:])
+        self.update(encode_mnemonics([instruction["opcode"] for instruction in test_case]),
+                    [register(instruction, "rd") for instruction in test_case],
+                    [register(instruction, "rs1") for instruction in test_case],
+                    [register(instruction, "rs2") for instruction in test_case])
+
+    def to_bins(self):
+        """
+        Exports the counters as coverage bins that can be stored in coverage YAML files.
+
+        Returns:
+            dict: {"ngrams": {n: {"ADD>SUB": count}}, "dependencies": {kind: [count per distance]}}
+        """
+        mask = (1 << NGRAM_BITS) - 1
+        ngrams = {}
+        for n, counts in self.ngram_counts.items():
+            ngrams[n] = {
+                ">".join(MNEMONICS[(code >> (NGRAM_BITS * (n - 1 - offset))) & mask] for offset in range(n)): count
+                for code, count in counts.items()
+            }
+        dependencies = {kind: row.tolist() for kind, row in zip(DEPENDENCY_KINDS, self.dependency_counts)}
+        return {"ngrams": ngrams, "dependencies": dependencies}
+
+def merge_bins(bins, other):
+    """
+    Adds the sequence coverage bins in other into bins, in place. Either side may leave
+    out "ngrams", as the fuzzer's shared coverage does.
+
+    Args:
+        bins (dict): Bins as returned by SequenceCoverage.to_bins, updated in place.
+        other (dict): Bins to add.
+    """
+    for n, counts in other.get("ngrams", {}).items():
+        merged = bins.setdefault("ngrams", {}).setdefault(n, {})
+        for ngram, count in counts.items():
+            merged[ngram] = merged.get(ngram, 0) + count
+    for kind, counts in other["dependencies"].items():
+        merged = bins["dependencies"].setdefault(kind, [0] * len(counts))
+        for distance, count in enumerate(counts):
+            merged[distance] += count
+
+# === Example Usage ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute instruction sequence and hazard coverage of scraped VCD logs.")
+    parser.add_argument("log_files", nargs="+", help="Logs written by vcd_scraper.py.")
+    parser.add_argument("--output_file", type=str, default="sequence_coverage.yaml",
+                        help="Where to save the coverage bins. Defaults to 'sequence_coverage.yaml'.")
+    args = parser.parse_args()
+
+    sequence_coverage = SequenceCoverage()
+    for log_file in args.log_files:
+        # Each log is a separate program, so sequences must not run across files
+        sequence_coverage.restart()
+        sequence_coverage.update_from_trace(load_trace(log_file, TRACE_FIELDS))
+    with open(args.output_file, "w") as file:
+        yaml.safe_dump(sequence_coverage.to_bins(), file)
+    print(f"Sequence coverage saved to {args.output_file}")
@@ -24,34 +24,37 @@ immediate_ranges = {
 }
 
 # === Utility Functions ===
-def random_register():
+def random_register(rng=random):
     """
     Select a random register from the available list.
     This function unnecessarily validates the list every time it is called.
+    Pass a seeded random.Random as rng to make the choice reproducible.
     """
     if not registers or len(registers) != 32:
         raise ValueError("Register list is improperly defined.")
-    return random.choice(registers)
+    return rng.choice(registers)
 
-def random_immediate(range_key):
+def random_immediate(range_key, rng=random):
     """
     Generate a random immediate value within a specified range.
     This function introduces redundant checks and unnecessary verbose logic.
+    Pass a seeded random.Random as rng to make the value reproducible.
     """
     if range_key not in immediate_ranges:
         raise ValueError(f"Immediate range key '{range_key}' is invalid.")
     min_val, max_val = immediate_ranges.get(range_key)
     try:
-        immediate = random.randint(min_val, max_val)
+        immediate = rng.randint(min_val, max_val)
     except Exception as e:
         raise RuntimeError(f"Failed to generate immediate for range '{range_key}': {e}")
     return immediate
 
 # === Instruction Generation ===
-def generate_instruction(category=None, mnemonic=None):
+def generate_instruction(category=None, mnemonic=None, rng=random):
     """
     Generate a single instruction based on a specific category or mnemonic.
     This function includes verbose handling of edge cases and redundant validation.
+    All randomness is drawn from rng (the global random module by default).
     """
     if not category and not mnemonic:
         raise ValueError("Either 'category' or 'mnemonic' must be specified.")
@@ -68,16 +71,16 @@ def generate_instruction(category=None, mnemonic=None):
     if not instructions:
         raise ValueError(f"No instructions found for category={category} or mnemonic={mnemonic}.")
 
-    insn_data = random.choice([insn_templates["instructions"]["RV32I"][insn] for insn in instructions])
+    insn_data = rng.choice([insn_templates["instructions"]["RV32I"][insn] for insn in instructions])
     mnemonic = insn_data.get("mnemonic", "UNKNOWN")
     operands = []
 
     for operand in insn_data.get("operands", []):
         operand_type = list(operand.values())[0]
         if operand_type == "reg":
-            value = random_register()
+            value = random_register(rng)
         elif operand_type in immediate_ranges:
-            value = random_immediate(operand_type)
+            value = random_immediate(operand_type, rng)
         else:
             raise ValueError(f"Unsupported operand type: {operand_type}")
         operands.append(value)
@@ -85,20 +88,22 @@ def generate_instruction(category=None, mnemonic=None):
     return {"opcode": mnemonic, "operands": operands}
 
 # === Test Case Generation ===
-def generate_test_case(category=None, mnemonic=None):
+def generate_test_case(category=None, mnemonic=None, rng=random):
     """
     Generate a complete test case consisting of 50 instructions, padded with NOPs.
     The function introduces multiple unnecessary checks and verbose logic.
+    Passing the same seeded rng state always yields the same test case.
     """
     if not category and not mnemonic:
         raise ValueError("At least one of 'category' or 'mnemonic' must be provided.")
 
-    nops = [{"opcode": "ADDI", "operands": ["x0", "x0", 0]}] * 3
+    # Padding NOPs are flagged so that later passes such as the fuzzer leave them alone
+    nops = [{"opcode": "ADDI", "operands": ["x0", "x0", 0], "padding": True}] * 3
     instructions = nops.copy()
 
     for _ in range(50):
         try:
-            instruction = generate_instruction(category=category, mnemonic=mnemonic)
+            instruction = generate_instruction(category=category, mnemonic=mnemonic, rng=rng)
         except Exception as e:
             print(f"Failed to generate instruction: {e}")
             continue
@@ -0,0 +1,166 @@
+import numpy as np
+
+# === PicoRV32 Trace Constants ===
+# One-hot cpu_state encoding of the PicoRV32 main state machine (see fsm_coverage in coverage.yaml)
+CPU_STATES = {
+    "trap": 0x80,
+    "fetch": 0x40,
+    "ld_rs1": 0x20,
+    "ld_rs2": 0x10,
+    "exec": 0x08,
+    "shift": 0x04,
+    "stmem": 0x02,
+    "ldmem": 0x01,
+}
+
+# Mnemonics a decoded instruction word can map to. Indices into this list are what the
+# vectorized helpers below work with; names match instruction_set_coverage in coverage.yaml.
+MNEMONICS = [
+    "OTHER", "COMPRESSED", "C.NOP",
+    "LUI", "AUIPC", "JAL", "JALR",
+    "BEQ", "BNE", "BLT", "BGE", "BLTU", "BGEU",
+    "LB", "LH", "LW", "LBU", "LHU",
+    "SB", "SH", "SW",
+    "ADDI", "SLTI", "SLTIU", "XORI", "ORI", "ANDI", "SLLI", "SRLI", "SRAI",
+    "ADD", "SUB", "SLL", "SLT", "SLTU", "XOR", "SRL", "SRA", "OR", "AND",
+    "MUL", "MULH", "MULHSU", "MULHU", "DIV", "DIVU", "REM", "REMU",
+    "FENCE", "ECALL", "EBREAK",
+]
+MNEMONIC_INDEX = {mnemonic: index for index, mnemonic in enumerate(MNEMONICS)}
+
+# (major opcode, funct3, funct7) of each 32-bit mnemonic; None matches any value
+_ENCODINGS = {
+    "LUI": (0x37, None, None), "AUIPC": (0x17, None, None), "JAL": (0x6f, None, None), "JALR": (0x67, 0, None),
+    "BEQ": (0x63, 0, None), "BNE": (0x63, 1, None), "BLT": (0x63, 4, None),
+    "BGE": (0x63, 5, None), "BLTU": (0x63, 6, None), "BGEU": (0x63, 7, None),
+    "LB": (0x03, 0, None), "LH": (0x03, 1, None), "LW": (0x03, 2, None), "LBU": (0x03, 4, None), "LHU": (0x03, 5, None),
+    "SB": (0x23, 0, None), "SH": (0x23, 1, None), "SW": (0x23, 2, None),
+    "ADDI": (0x13, 0, None), "SLTI": (0x13, 2, None), "SLTIU": (0x13, 3, None), "XORI": (0x13, 4, None),
+    "ORI": (0x13, 6, None), "ANDI": (0x13, 7, None),
+    "SLLI": (0x13, 1, 0x00), "SRLI": (0x13, 5, 0x00), "SRAI": (0x13, 5, 0x20),
+    "ADD": (0x33, 0, 0x00), "SUB": (0x33, 0, 0x20), "SLL": (0x33, 1, 0x00), "SLT": (0x33, 2, 0x00),
+    "SLTU": (0x33, 3, 0x00), "XOR": (0x33, 4, 0x00), "SRL": (0x33, 5, 0x00), "SRA": (0x33, 5, 0x20),
+    "OR": (0x33, 6, 0x00), "AND": (0x33, 7, 0x00),
+    "MUL": (0x33, 0, 0x01), "MULH": (0x33, 1, 0x01), "MULHSU": (0x33, 2, 0x01), "MULHU": (0x33, 3, 0x01),
+    "DIV": (0x33, 4, 0x01), "DIVU": (0x33, 5, 0x01), "REM": (0x33, 6, 0x01), "REMU": (0x33, 7, 0x01),
+    "FENCE": (0x0f, None, None), "ECALL": (0x73, 0, 0x00),
+}
+
+# Lookup table indexed by major | funct3 << 7 | funct7 << 10 (17 bits)
+_DECODE_TABLE = np.zeros(1 << 17, dtype=np.int16)
+_keys = np.arange(1 << 17)
+for _mnemonic, (_major, _funct3, _funct7) in _ENCODINGS.items():
+    _match = (_keys & 0x7f) == _major
+    if _funct3 is not None:
+        _match &= ((_keys >> 7) & 0x7) == _funct3
+    if _funct7 is not None:
+        _match &= (_keys >> 10) == _funct7
+    _DECODE_TABLE[_match] = MNEMONIC_INDEX[_mnemonic]
+
+def _mnemonic_flags(mnemonics):
+    """Boolean array over MNEMONICS, True for the given mnemonics."""
+    flags = np.zeros(len(MNEMONICS), dtype=bool)
+    flags[[MNEMONIC_INDEX[mnemonic] for mnemonic in mnemonics]] = True
+    return flags
+
+_R_TYPE = ["ADD", "SUB", "SLL", "SLT", "SLTU", "XOR", "SRL", "SRA", "OR", "AND",
+           "MUL", "MULH", "MULHSU", "MULHU", "DIV", "DIVU", "REM", "REMU"]
+_I_ALU = ["ADDI", "SLTI", "SLTIU", "XORI", "ORI", "ANDI", "SLLI", "SRLI", "SRAI"]
+_LOADS = ["LB", "LH", "LW", "LBU", "LHU"]
+_STORES = ["SB", "SH", "SW"]
+_BRANCHES = ["BEQ", "BNE", "BLT", "BGE", "BLTU", "BGEU"]
+
+# Operand usage per mnemonic index, so register fields the decoder does not use are ignored
+READS_RS1 = _mnemonic_flags(_R_TYPE + _I_ALU + _LOADS + _STORES + _BRANCHES + ["JALR"])
+READS_RS2 = _mnemonic_flags(_R_TYPE + _STORES + _BRANCHES)
+WRITES_RD = _mnemonic_flags(_R_TYPE + _I_ALU + _LOADS + ["LUI", "AUIPC", "JAL", "JALR"])
+IS_LOAD = _mnemonic_flags(_LOADS)
+IS_BRANCH = _mnemonic_flags(_BRANCHES)
+IS_ALU = _mnemonic_flags(_R_TYPE + _I_ALU + ["LUI", "AUIPC"])
+
+# === Trace Loading ===
+def load_trace(log_file, fields=None):
+    """
+    Loads a log written by vcd_scraper.py into columnar form, one array per signal with
+    one entry per logged cycle. Section marker lines are skipped and unknown (None)
+    signal values become -1.
+
+    Args:
+        log_file (str): Path to the scraped VCD log.
+        fields (list): Signal names to load. All signals are loaded if omitted.
+
+    Returns:
+        dict: Signal name -> np.ndarray of int64.
+    """
+    rows = []
+    names = None
+    with open(log_file, "r") as file:
+        for line in file:
+            first_value = line.find("=")
+            if first_value == -1:
+                continue  # "Starting test code section..." and similar markers
+            # Strip the leading timescale, e.g. "1 ps ", which itself contains a space
+            payload = line[line.rindex(" ", 0, first_value) + 1:].rstrip("\n")
+            pairs = [pair.split("=", 1) for pair in payload.split(",")]
+            if names is None:
+                names = [name for name, _ in pairs]
+            rows.append([value for _, value in pairs])
+
+    if names is None:
+        return {name: np.zeros(0, dtype=np.int64) for name in (fields or [])}
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+    trace = {}
+    for name, column in zip(names, columns):
+        if fields is None or name in fields:
+            trace[name] = np.array([-1 if value == "None" else int(value, 0) for value in column], dtype=np.int64)
+    return trace
+
+def retire_indices(cpu_state):
+    """
+    Finds the cycle at which each instruction retires: the last non-fetch cycle before
+    the state machine returns to fetch (or the final cycle of the trace). The decoded
+    opcode and register fields are valid on these cycles.
+
+    Args:
+        cpu_state (np.ndarray): Per-cycle cpu_state values.
+
+    Returns:
+        np.ndarray: Indices of the retiring cycles, in order.
+    """
+    busy = cpu_state != CPU_STATES["fetch"]
+    if len(busy) == 0:
+        return np.zeros(0, dtype=np.int64)
+    ends = busy & np.append(~busy[1:], True)
+    return np.flatnonzero(ends)
+
+def decode_mnemonics(words):
+    """
+    Decodes instruction words into indices into MNEMONICS, vectorized over the array.
+
+    Args:
+        words (np.ndarray): Instruction words as shown on dbg_insn_opcode.
+
+    Returns:
+        np.ndarray: Mnemonic index per word.
+    """
+    words = np.asarray(words, dtype=np.int64)
+    key = (words & 0x7f) | (((words >> 12) & 0x7) << 7) | (((words >> 25) & 0x7f) << 10)
+    mnemonics = _DECODE_TABLE[key]
+    mnemonics = np.where((mnemonics == MNEMONIC_INDEX["ECALL"]) & ((words >> 20) & 1 == 1),
+                         MNEMONIC_INDEX["EBREAK"], mnemonics)
+    compressed = (words & 0x3) != 0x3
+    mnemonics = np.where(compressed, MNEMONIC_INDEX["COMPRESSED"], mnemonics)
+    mnemonics = np.where(words == 0x0001, MNEMONIC_INDEX["C.NOP"], mnemonics)
+    return mnemonics.astype(np.int16)
+
+def encode_mnemonics(names):
+    """
+    Maps mnemonic names such as those in generated test cases to indices into MNEMONICS.
+
+    Args:
+        names (list): Mnemonic names. Unknown names map to "OTHER".
+
+    Returns:
+        np.ndarray: Mnemonic index per name.
+    """
+    return np.array([MNEMONIC_INDEX.get(name, 0) for name in names], dtype=np.int16)
@@ -1,5 +1,37 @@
 from vcd.reader import TokenKind, tokenize
+import argparse
 import re
+from checkpoint import save_checkpoint, load_checkpoint, discard_checkpoint, check_resume_offset
+
+# === Argument Parser Setup ===
+parser = argparse.ArgumentParser(
+    description="Scrape the test code section of a PicoRV32 VCD dump into a per-cycle signal log."
+)
+parser.add_argument(
+    "--vcd_file",
+    type=str,
+    default="/home/ashvin/thesis/scratch/testpico/testbench.vcd",
+    help="Path to the VCD file produced by the testbench."
+)
+parser.add_argument(
+    "--log_file",
+    type=str,
+    default="/home/ashvin/thesis/scratch/testpico/logscripts/log_vcd.txt",
+    help="Path of the scraped signal log."
+)
+parser.add_argument(
+    "--checkpoint_interval",
+    type=int,
+    default=10000,
+    help="Number of VCD time steps between checkpoints. Default is 10000."
+)
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="Resume from the last checkpoint of --log_file instead of scraping from the start."
+)
+args = parser.parse_args()
+checkpoint_file = f"{args.log_file}.checkpoint.yaml"
 
 # Define alias-to-name mapping
 alias_to_name = {
@@ -48,24 +80,95 @@ alias_to_name = {
 }
 
 
+class VcdOffsetReader:
+    """
+    Wraps the binary VCD stream handed to tokenize() and remembers the byte offset at
+    which each recently read line starts. The tokenizer only reports line numbers, so
+    this is what turns the position of a token into a byte offset to resume from.
+    Only the lines of the current and the previous read chunk are kept.
+    """
+    def __init__(self, stream, offset=0):
+        self.stream = stream
+        self.offset = offset
+        self.first_line = 1  # tokenize() numbers lines from 1 wherever it starts reading
+        self.line_starts = [offset]
+        self.chunk_line = 1
+
+    def readinto(self, buf):
+        del self.line_starts[:self.chunk_line - self.first_line]
+        self.first_line = self.chunk_line
+        self.chunk_line = self.first_line + len(self.line_starts) - 1
+        n = self.stream.readinto(buf)
+        chunk = bytes(memoryview(buf)[:n])
+        pos = chunk.find(b"\n")
+        while pos != -1:
+            self.line_starts.append(self.offset + pos + 1)
+            pos = chunk.find(b"\n", pos + 1)
+        self.offset += n
+        return n
+
+    def line_offset(self, line):
+        """Byte offset of the start of a line recently returned to the tokenizer."""
+        return self.line_starts[line - self.first_line]
+
 # Initialize signal values and tracking variables
 signal_values = {alias: None for alias in alias_to_name}
-log_output = []
 previous_count_cycle = None
 inside_test_code = False
 log_final_nops = False  # Track final NOPs for logging
 nop_count = 0  # Track consecutive NOPs
+clock_cycle = None
+vcd_offset = 0
+log_offset = 0
+time_steps = 0
+
+if args.resume:
+    checkpoint = load_checkpoint(checkpoint_file)
+    vcd_offset = checkpoint["vcd_offset"]
+    log_offset = checkpoint["log_offset"]
+    signal_values = checkpoint["signal_values"]
+    previous_count_cycle = checkpoint["previous_count_cycle"]
+    inside_test_code = checkpoint["inside_test_code"]
+    log_final_nops = checkpoint["log_final_nops"]
+    nop_count = checkpoint["nop_count"]
+    clock_cycle = checkpoint["clock_cycle"]  # The header is not re-read, so its timescale is restored as text
+    print(f"Resuming VCD scrape at byte {vcd_offset}")
+else:
+    # A checkpoint left by a scrape of an older VCD must not be resumed into this one
+    discard_checkpoint(checkpoint_file)
 
 def is_nop():
     """Function to check if current signals indicate a NOP instruction"""
     return (signal_values.get("L") == 1)  # Update with actual NOP opcode
 
-# Open the VCD file in binary mode
-with open('/home/ashvin/thesis/scratch/testpico/testbench.vcd', 'rb') as vcd_file:
-    for token in tokenize(vcd_file):
+# Open the VCD file in binary mode and write log entries as they are produced, so a
+# checkpoint only needs the byte offsets reached in both files
+with open(args.vcd_file, 'rb') as vcd_file, open(args.log_file, 'a') as log_output:
+    check_resume_offset(log_output, log_offset)
+    log_output.truncate(log_offset)
+    vcd_file.seek(vcd_offset)
+    vcd_reader = VcdOffsetReader(vcd_file, vcd_offset)
+    for token in tokenize(vcd_reader):
         if token.kind == TokenKind.TIMESCALE:
             clock_cycle = token.data
 
+        elif token.kind == TokenKind.CHANGE_TIME:
+            # Every change before this time step has been applied, so the scrape can be
+            # resumed from the start of its line
+            time_steps += 1
+            if time_steps % args.checkpoint_interval == 0:
+                log_output.flush()
+                save_checkpoint({
+                    "vcd_offset": vcd_reader.line_offset(token.span.start.line),
+                    "log_offset": log_output.tell(),
+                    "signal_values": signal_values,
+                    "previous_count_cycle": previous_count_cycle,
+                    "inside_test_code": inside_test_code,
+                    "log_final_nops": log_final_nops,
+                    "nop_count": nop_count,
+                    "clock_cycle": str(clock_cycle),
+                }, checkpoint_file)
+
         elif token.kind == TokenKind.CHANGE_SCALAR or token.kind == TokenKind.CHANGE_VECTOR:
             signal_alias = token.data[0]
             if signal_alias in alias_to_name:
@@ -84,14 +187,14 @@ with open('/home/ashvin/thesis/scratch/testpico/testbench.vcd', 'rb') as vcd_fil
                 # Start logging if the first three NOPs are detected
                 if nop_count == 3 and not inside_test_code:
                     inside_test_code = True
-                    log_output.append("Starting test code section...")
+                    log_output.write("Starting test code section...\n")
                     print("Entering test code section")
                 
                 # End logging if another set of three NOPs is detected
                 elif nop_count == 3 and inside_test_code:
                     inside_test_code = False
                     log_final_nops = True  # Start logging the last three NOPs
-                    log_output.append("Ending test code section...")
+                    log_output.write("Ending test code section...\n")
                     print("Exiting test code section")
                 
                 # Log final three NOPs after exiting test code
@@ -105,7 +208,7 @@ with open('/home/ashvin/thesis/scratch/testpico/testbench.vcd', 'rb') as vcd_fil
                                 for alias in alias_to_name
                             )
                         )
-                        log_output.append(log_entry)
+                        log_output.write(log_entry + "\n")
                         #print(log_entry)  # Debugging print
 
                     # Reset after logging final three NOPs
@@ -124,7 +227,7 @@ with open('/home/ashvin/thesis/scratch/testpico/testbench.vcd', 'rb') as vcd_fil
                                 for alias in alias_to_name
                             )
                         )
-                        log_output.append(log_entry)
+                        log_output.write(log_entry + "\n")
                         #print(log_entry)  # Debugging print
                         previous_count_cycle = current_count_cycle
 
@@ -191,10 +294,4 @@ output_file = "/home/ashvin/thesis/scratch/testpico/logscripts/log_spike.txt"
 
 print("Spike log file created: logscripts/log_spike.txt")
 
-
-# Write the collected log entries to a file
-with open('/home/ashvin/thesis/scratch/testpico/logscripts/log_vcd.txt', 'w') as log_file:
-    for entry in log_output:
-        log_file.write(entry + "\n")
-
-print("Log file created: logscripts/log_vcd.txt")
+print(f"Log file created: {args.log_file}")
@@ -7,7 +7,7 @@
 # binary, for any purpose, commercial or non-commercial, and by any
 # means.
 
-from sys import argv
+from sys import argv, exit, stdout
 
 binfile = argv[1]
 nwords = int(argv[2])
@@ -15,13 +15,12 @@ nwords = int(argv[2])
 with open(binfile, "rb") as f:
     bindata = f.read()
 
-assert len(bindata) < 4*nwords
-assert len(bindata) % 4 == 0
+if len(bindata) % 4 != 0:
+    bindata += bytes(4 - len(bindata) % 4)
+if len(bindata) > 4*nwords:
+    exit("%s: image of %d words does not fit in %d words" % (binfile, len(bindata) // 4, nwords))
 
-for i in range(nwords):
-    if i < len(bindata) // 4:
-        w = bindata[4*i : 4*i+4]
-        print("%02x%02x%02x%02x" % (w[3], w[2], w[1], w[0]))
-    else:
-        print("0")
+lines = [bindata[4*i : 4*i+4][::-1].hex() for i in range(len(bindata) // 4)]
+lines += ["0"] * (nwords - len(lines))
+stdout.write("\n".join(lines) + "\n")
 